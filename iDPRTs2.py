@@ -8,12 +8,16 @@ Shout out to Bitflip, Tsathoggualware, Reid and all the mad lasses and lads whos
 #System imports
 import socket
 import sys
-from time import sleep
+from time import sleep, monotonic
 import struct
 import serial
 import serial.tools.list_ports
 import json
+import csv
+import os
 import argparse
+import mmap
+import re
 
 #Tkinter imports
 import tkinter as tk
@@ -32,10 +36,29 @@ import PIL.ImageChops
 import PIL.ImageOps
 import PIL.ImageEnhance
 
+#PyMuPDF is optional, only needed to print SVG and PDF files
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+#qrcode is optional, only needed for [[qr:...]] lines in text jobs
+try:
+    import qrcode
+except ImportError:
+    qrcode = None
+
 # Check for command line arguments (web mode)
 parser = argparse.ArgumentParser(description='CTP500 Thermal Printer Control')
 parser.add_argument('--web-data', help='JSON file containing web print data')
 parser.add_argument('--get-com-ports', action='store_true', help='Get list of available COM ports')
+parser.add_argument('--bulk-data', help='CSV or JSONL file with one label per row, printed in a single session')
+parser.add_argument('--template', help='Label text template for --bulk-data, with {column} placeholders')
+parser.add_argument('--template-file', help='Text file holding the label template for --bulk-data')
+parser.add_argument('--com-port', default='COM3', help='COM port, or out.bin / out.png / null output, used by --bulk-data and --replay')
+parser.add_argument('--font', help='Font file used by --bulk-data')
+parser.add_argument('--font-size', type=int, help='Font size used by --bulk-data')
+parser.add_argument('--replay', help='Send a captured .bin print file to --com-port without re-rendering it')
 args = parser.parse_args()
 
 def get_available_com_ports():
@@ -45,6 +68,7 @@ def get_available_com_ports():
 
 #COMMUNICATION LOGIC STARTS HERE
 com_port = "COM1" #Default COM port - will be selectable in UI
+baud_rate = 9600 #Serial link speed, also what paces how fast rows reach the print head
 
 class PrinterConnect: #Starting a PrinterConnect class to keep track of connection status
     def __init__(self):
@@ -57,7 +81,7 @@ class PrinterConnect: #Starting a PrinterConnect class to keep track of connecti
             return True #Switching PrinterConnect connection status
 
         try: #Starting all the things to do to establish a connection
-            self.serial_conn = serial.Serial(com_port, 9600, timeout=1) #Setting up serial connection at 9600 baud
+            self.serial_conn = serial.Serial(com_port, baud_rate, timeout=1) #Setting up serial connection at 9600 baud
 
             print("Getting printer status")
             status = self.get_printer_status() #Calling the get_printer_status() function and storing it in status variable
@@ -106,100 +130,202 @@ class PrinterConnect: #Starting a PrinterConnect class to keep track of connecti
         return self.serial_conn.read(38) #Returning status request content
 
 
-printer = PrinterConnect() #Creating a printer connection instance here. Having it *outside* of a function lets us run and monitor connection across global scope
-printerWidth = 384  # For CPT500
-
-# Check if getting COM ports
-if args.get_com_ports:
-    try:
-        ports = get_available_com_ports()
-        print(json.dumps({'ports': ports}))
-        sys.exit(0)
-    except Exception as e:
-        print(json.dumps({'ports': ['COM1', 'COM2', 'COM3', 'COM4', 'COM5']}))
-        sys.exit(1)
-
-# Check if running in web mode
-if args.web_data:
-    try:
-        # Load web data
-        with open(args.web_data, 'r') as f:
-            web_data = json.load(f)
-
-        action = web_data.get('action')
-        com_port = web_data.get('com_port', 'COM3')
-
-        # Connect to printer
-        if not printer.connect(com_port):
-            print("Failed to connect to printer")
-            sys.exit(1)
+#OUTPUT BACKENDS STARTS HERE
+class OfflineConnect: #Base for output backends standing in for PrinterConnect when there's no printer on a COM port
+    offline = True #Tells pace() not to wait on a printer that isn't there
 
-        if action == 'print_text':
-            # Process text printing
-            text_content = web_data.get('text_content', '')
-            font = web_data.get('font', 'arial.ttf')
-            font_size = int(web_data.get('font_size', 28))
-            bold = web_data.get('bold', 'false').lower() == 'true'
-            italic = web_data.get('italic', 'false').lower() == 'true'
-            strikethrough = web_data.get('strikethrough', 'false').lower() == 'true'
+    def __init__(self):
+        self.serial_conn = None #Points back at the backend itself once connected, so serial_conn.write works as usual
+        self.connected = False
+        self.target = None #Output file name, or "null"
 
-            # Update global text formatting options
-            global text_font, text_size, text_bold, text_italic, text_strikethrough
-            text_font = font
-            text_size = font_size
-            text_bold = bold
-            text_italic = italic
-            text_strikethrough = strikethrough
+    def connect(self, target):
+        if self.connected:
+            print("Already connected")
+            return True
 
-            img = create_text(text_content)
+        try:
+            self.target = target
+            self.bytes_written = 0
+            self.writes = 0
+            self.write_time = 0.0 #Seconds spent inside write(), the rest of the session is rendering
+            self.started = monotonic()
+            self.open_output()
+            self.serial_conn = self
+            self.connected = True
+            print(f'Sending print data to {target}')
+            return True
 
-            # Print the text
-            initializePrinter(printer.serial_conn)
-            sleep(0.5)
-            sendStartPrintSequence(printer.serial_conn)
-            sleep(0.5)
-            printImage(printer.serial_conn, img)
-            sleep(0.5)
-            # Add two blank lines before end sequence
-            printer.serial_conn.write(b"\r\n\r\n")
-            sleep(0.2)
-            sendEndPrintSequence(printer.serial_conn)
-            sleep(0.5)
+        except Exception as e:
+            print(f'Connection error: {e}')
+            messagebox.showerror("Connection Error", f'Failed to open {target}: {e}')
+            return False
 
-            print("Text printed successfully")
+    def disconnect(self):
+        if not self.connected:
+            print("Not connected")
+            return
 
-        elif action == 'print_image':
-            # Process image printing
-            image_path = web_data.get('image_path', '')
-            brightness = float(web_data.get('brightness', 1.0))
+        try:
+            self.close_output()
+        except Exception as e:
+            print(f'Disconnection error: {e}')
+        elapsed = monotonic() - self.started
+        print(f'{self.bytes_written} bytes in {self.writes} writes to {self.target}, '
+              f'{elapsed:.2f}s total, {elapsed - self.write_time:.2f}s rendering')
+        self.serial_conn = None
+        self.connected = False
 
-            # Load and process image
-            global image_brightness
-            image_brightness = brightness
-            current_image = PIL.Image.open(image_path)
-            apply_image_brightness()  # Apply brightness adjustment
+    def get_printer_status(self):
+        return b''
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        started = monotonic()
+        self.output(data)
+        self.write_time += monotonic() - started
+        self.bytes_written += len(data)
+        self.writes += 1
+        return len(data)
+
+    def open_output(self):
+        pass
+
+    def output(self, data):
+        pass
+
+    def close_output(self):
+        pass
+
+class FileConnect(OfflineConnect): #Captures the raw ESC/POS byte stream into a .bin file for replaying later
+    def open_output(self):
+        self.output_file = open(self.target, 'wb')
+
+    def output(self, data):
+        self.output_file.write(data)
+
+    def close_output(self):
+        self.output_file.close()
+
+class PreviewConnect(OfflineConnect): #Saves the exact 1-bit raster of every print job as a .png preview: out.png, out-2.png...
+    def open_output(self):
+        self.pending = b'' #Bytes of a command that hasn't fully arrived yet
+        self.rasters = [] #Packed rows of the current job only, so long bulk runs don't pile up in memory
+        self.jobs = 0
+
+    def output(self, data): #Collecting rasters as they arrive, saving a job at every end sequence
+        self.pending += data
+        consumed = 0
+        for kind, payload in iter_commands(self.pending):
+            if kind == 'partial':
+                break #Wait for the rest of this command
+            if kind == 'raster':
+                self.rasters.append(payload)
+                consumed += 8 + len(payload[1])
+            else:
+                consumed += len(payload)
+                if kind == 'end':
+                    self.save_job()
+        self.pending = self.pending[consumed:]
+
+    def close_output(self):
+        self.save_job()
+        if not self.jobs:
+            print("Nothing to preview")
+
+    def save_job(self): #Stacking the current job's rasters into one image and writing it out
+        rasters = self.rasters
+        if not rasters:
+            return
+        self.rasters = []
+        self.jobs += 1
+        width = max(width_bytes for width_bytes, data in rasters) * 8
+        height = sum(len(data) // width_bytes for width_bytes, data in rasters)
+        preview = PIL.Image.new('1', (width, height), 1)
+        y_position = 0
+        for width_bytes, data in rasters:
+            rows = len(data) // width_bytes
+            band = PIL.Image.frombytes('1', (width_bytes * 8, rows), bytes(data))
+            preview.paste(PIL.ImageChops.invert(band), (0, y_position)) #Printer bits are set for black dots, PIL's for white
+            y_position += rows
+        name, extension = os.path.splitext(self.target)
+        preview.save(self.target if self.jobs == 1 else f'{name}-{self.jobs}{extension}')
+
+class NullConnect(OfflineConnect): #Throws the print data away, only keeping the timing stats
+    pass
+
+def open_backend(target): #Picking the output backend from the target name: .bin capture, .png preview, null sink or a real COM port
+    name = target.lower()
+    if name.endswith('.bin'):
+        return FileConnect()
+    if name.endswith('.png'):
+        return PreviewConnect()
+    if name == 'null':
+        return NullConnect()
+    return PrinterConnect()
+
+def connect_printer(target): #Swapping the global printer for the backend matching target, then connecting it
+    global printer
+    if printer.connected:
+        print("Already connected")
+        return True
+    printer = open_backend(target)
+    return printer.connect(target)
+
+def pace(serial_conn, seconds): #Giving the printer time to catch up, skipped for backends that aren't a printer
+    if not getattr(serial_conn, 'offline', False):
+        sleep(seconds)
+
+def is_partial_command(tail): #True when the stream stops partway into a command header
+    return ((len(tail) < 8 and b'\x1d\x76\x30'.startswith(tail[:3])) or tail == b'\x1b'
+            or (len(tail) < 4 and (b'\x1d\x49'.startswith(tail[:2]) or b'\x0a\x0a\x0a\x9a'.startswith(tail))))
+
+def iter_commands(data): #Splitting a byte stream into ('init' | 'start' | 'raster' | 'end' | 'bytes' | 'partial', payload) commands
+    pos = pending = 0
+    while pos < len(data):
+        if len(data) - pos < 8 and is_partial_command(data[pos:]):
+            kind, end = 'partial', len(data) #A command cut off at the end of the stream, more bytes may still come
+        elif data[pos:pos + 3] == b'\x1d\x76\x30':
+            kind = 'raster'
+            width_bytes = data[pos + 4] + data[pos + 5] * 256
+            rows = data[pos + 6] + data[pos + 7] * 256
+            end = pos + 8 + width_bytes * rows
+            payload = (width_bytes, data[pos + 8:end])
+            if end > len(data):
+                kind, end = 'partial', len(data)
+        elif data[pos:pos + 2] == b'\x1b\x40':
+            kind, end = 'init', pos + 2
+        elif data[pos:pos + 2] == b'\x1d\x49':
+            kind, end = 'start', pos + 4
+        elif data[pos:pos + 4] == b'\x0a\x0a\x0a\x9a':
+            kind, end = 'end', pos + 4
+        else:
+            pos += 1
+            continue
 
-            # Print the image
-            initializePrinter(printer.serial_conn)
-            sleep(0.5)
-            sendStartPrintSequence(printer.serial_conn)
-            sleep(0.5)
-            printImage(printer.serial_conn, current_image)
-            sleep(0.5)
-            # Add two blank lines before end sequence
-            printer.serial_conn.write(b"\r\n\r\n")
-            sleep(0.2)
-            sendEndPrintSequence(printer.serial_conn)
-            sleep(0.5)
+        if pending < pos: #Anything in between known commands, like the blank lines, goes through untouched
+            yield 'bytes', data[pending:pos]
+        if kind != 'raster':
+            payload = data[pos:end]
+        yield kind, payload
+        pos = pending = end
+    if pending < len(data):
+        yield 'bytes', data[pending:]
+#OUTPUT BACKENDS ENDS HERE
 
-            print("Image printed successfully")
+printer = PrinterConnect() #Creating a printer connection instance here. Having it *outside* of a function lets us run and monitor connection across global scope
+printerWidth = 384  # For CPT500
 
-        # Disconnect
-        printer.disconnect()
+# Check if getting COM ports
+if args.get_com_ports:
+    try:
+        ports = get_available_com_ports()
+        print(json.dumps({'ports': ports}))
         sys.exit(0)
-
     except Exception as e:
-        print(f"Web mode error: {e}")
+        print(json.dumps({'ports': ['COM1', 'COM2', 'COM3', 'COM4', 'COM5']}))
         sys.exit(1)
 
 #PRINTER COMMUNICATION LOGIC AND SETUP ENDS HERE
@@ -210,6 +336,7 @@ original_image = None #Variable to store original image for brightness adjustmen
 image_thumbnail = None #Variable to store image thumbnail
 image_preview = None #Variable to store image preview for PhotoImage and canvas
 image_brightness = 1.0 #Brightness multiplier (1.0 = original, >1 = brighter, <1 = darker)
+current_document = None #Path of the loaded SVG or PDF file, printed page by page instead of current_image
 #IMAGE DATA STORAGE ENDS HERE
 
 #TEXT FORMATTING OPTIONS STARTS HERE
@@ -299,8 +426,21 @@ def create_text(text):
     # Process text with styling
     y_position = 0
     line_height = font.getbbox("A")[3] + 5  # Get line height with some padding
+    symbol_top = None #Where a symbol opening the label starts, so trimming keeps its quiet zone
+    symbol_bottom = None #Where a symbol closing the label ends, same reason
 
     for line in text.splitlines():
+        symbol = symbolPattern.match(line)
+        if symbol: #Barcode and QR code lines are drawn dot for dot instead of as text
+            symbol_image = render_symbol(symbol.group(1).lower(), symbol.group(2))
+            img.paste(symbol_image, (0, y_position))
+            if y_position == 0:
+                symbol_top = 0
+            y_position += symbol_image.height
+            symbol_bottom = y_position
+            y_position += 5
+            continue
+
         wrapped_lines = get_wrapped_text(line, font, printerWidth)
         for wrapped_line in wrapped_lines.split('\n'):
             if wrapped_line.strip():  # Skip empty lines
@@ -319,8 +459,9 @@ def create_text(text):
                     d.line([(0, strike_y), (strike_width, strike_y)], fill=(0, 0, 0), width=2)
 
                 y_position += line_height
+                symbol_bottom = None
 
-    return trimImage(img) #Trimming down the unused height of the d object using the trimImage() function above
+    return trimImage(img, symbol_top, symbol_bottom) #Trimming down the unused height of the d object using the trimImage() function above
 
 def get_wrapped_text(text: str, font: PIL.ImageFont.ImageFont, line_length: int): #Function to wrap the text to printer paper width
     lines = [''] #Empty list to store the lines
@@ -338,21 +479,20 @@ def print_from_entry():
         messagebox.showwarning("No text", "Please type or load some text.")
         return
 
-    img = create_text(txt) #Turning the text to image
-
     if printer.connected and printer.serial_conn: #Send the text to the printer over the printer serial connection (if connected)
         try:
+            img = create_text(txt) #Turning the text to image, a bad barcode line ends up in the error dialog below
             initializePrinter(printer.serial_conn) #Initializing printer
-            sleep(0.5)
+            pace(printer.serial_conn, 0.5)
             sendStartPrintSequence(printer.serial_conn) #Starting up print sequence
-            sleep(0.5)
+            pace(printer.serial_conn, 0.5)
             printImage(printer.serial_conn, img) #Passing data to print
-            sleep(0.5)
+            pace(printer.serial_conn, 0.5)
             # Add two blank lines before end sequence
             printer.serial_conn.write(b"\r\n\r\n")
-            sleep(0.2)
+            pace(printer.serial_conn, 0.2)
             sendEndPrintSequence(printer.serial_conn) #Sending end of print sequence
-            sleep(0.5)
+            pace(printer.serial_conn, 0.5)
             #messagebox.showinfo("Success", "Printed successfully.") #Optional success message
         except Exception as e:
             messagebox.showerror("Printing error", str(e))
@@ -372,27 +512,33 @@ def print_from_image():
         return
 
     try:
+        if current_document: #SVG and PDF files are rasterized at print time, each page its own job
+            print("Printing document")
+            printDocument(printer.serial_conn, current_document)
+            messagebox.showinfo("Success", "Document printed successfully.")
+            return
+
         print("Initializing printer")
         initializePrinter(printer.serial_conn)
-        sleep(0.5)
+        pace(printer.serial_conn, 0.5)
 
         print("Starting print sequence")
         sendStartPrintSequence(printer.serial_conn)
-        sleep(0.5)
+        pace(printer.serial_conn, 0.5)
 
         # THIS is where we actually hand the image over
         print("Printing image")
         printImage(printer.serial_conn, current_image)
 
         print("Adding blank lines")
-        sleep(0.5)
+        pace(printer.serial_conn, 0.5)
         # Add two blank lines before end sequence
         printer.serial_conn.write(b"\r\n\r\n")
-        sleep(0.2)
+        pace(printer.serial_conn, 0.2)
 
         print("Sending end sequence")
         sendEndPrintSequence(printer.serial_conn)
-        sleep(0.5)
+        pace(printer.serial_conn, 0.5)
 
         messagebox.showinfo("Success", "Image printed successfully.")
     except Exception as e:
@@ -405,7 +551,7 @@ def selectImageFile():
     imageFilepath = fd.askopenfilename(
         title = "Open an image file",
         initialdir = "/",
-        filetypes = (('PNG files', '*.png'), ('JPG files', '*.jpg'), ('jpeg files', '*.jpeg'), ('BMP files', '*.bmp'), ('SVG files', '*.svg'), ('all files', '*.*'))
+        filetypes = (('PNG files', '*.png'), ('JPG files', '*.jpg'), ('jpeg files', '*.jpeg'), ('BMP files', '*.bmp'), ('SVG files', '*.svg'), ('PDF files', '*.pdf'), ('all files', '*.*'))
         )
 
     showinfo(
@@ -418,8 +564,13 @@ def selectImageFile():
         try:
             print("Opening image file")
             # Store original image for brightness adjustments
-            global original_image
-            original_image = PIL.Image.open(imageFilepath, 'r') #Storing the original image
+            global original_image, current_document
+            if is_document(imageFilepath):
+                current_document = imageFilepath #Only the first page gets rendered here, for the preview
+                original_image = document_preview(imageFilepath)
+            else:
+                current_document = None
+                original_image = PIL.Image.open(imageFilepath, 'r') #Storing the original image
             current_image = original_image.copy() #Make a copy to work with
             print(current_image)
             apply_image_brightness()  # Apply brightness adjustment to current_image
@@ -496,7 +647,54 @@ def update_text_style(style, value):
 
 #IMAGE FILE SECTION ENDS HERE
 
+#THERMAL SCHEDULING STARTS HERE
+class ThermalScheduler: #Keeps a running estimate of print head heat so long black-heavy jobs don't fade or stall
+    def __init__(self, band_height=24, link_bytes_per_second=baud_rate / 10, heat_capacity=40000, cool_rate=3000):
+        self.band_height = band_height #Raster rows per band the load is estimated on
+        self.link_bytes_per_second = link_bytes_per_second #Rows can't print faster than the serial link delivers them (8N1 is 10 bits a byte)
+        self.heat_capacity = heat_capacity #Black dots worth of heat the head can take before it needs a break, about 5s of solid black
+        self.cool_rate = cool_rate #Black dots worth of heat the head sheds every second, about 40% black keeps up forever
+        self.heat = 0.0 #Current heat estimate, in black dots
+        self.last_time = None #When the last planned band finishes printing, to cool down between jobs
+
+    def band_load(self, band): #Counting black dots in a band of packed raster data (set bits are burnt dots)
+        return bin(int.from_bytes(band, 'big')).count('1')
+
+    def plan(self, data, width_bytes): #Splitting packed raster data into (first_row, last_row, pause) segments
+        now = monotonic()
+        if self.last_time is not None and now > self.last_time: #The head cooled down while we were idle
+            self.heat = max(0.0, self.heat - (now - self.last_time) * self.cool_rate)
+
+        rows = len(data) // width_bytes
+        band_bytes = self.band_height * width_bytes
+        start = 0
+        pause = 0.0
+        busy = 0.0 #Seconds of printing planned from now on, pauses included
+        for first in range(0, rows, self.band_height):
+            last = min(first + self.band_height, rows)
+            band_time = (last - first) * width_bytes / self.link_bytes_per_second
+            heat = max(0.0, self.heat - band_time * self.cool_rate) + self.band_load(data[first * width_bytes:first * width_bytes + band_bytes])
+            if heat > self.heat_capacity: #Too hot, cool down before this band instead of burning it
+                if first > start:
+                    yield start, first, pause
+                    start = first
+                pause = (heat - self.heat_capacity / 2) / self.cool_rate #Cooling down to half capacity so pauses stay few and far between
+                busy += pause
+                heat = self.heat_capacity / 2
+            self.heat = heat
+            busy += band_time
+        if rows > start:
+            yield start, rows, pause
+        self.last_time = now + busy
+
+thermal = ThermalScheduler() #One scheduler for the whole session, so heat carries over from one job to the next
+#THERMAL SCHEDULING ENDS HERE
+
 def printImage(serial_conn, im):
+    width_bytes, data = packImage(im)
+    sendRaster(serial_conn, width_bytes, data)
+
+def packImage(im): #Turning any PIL image into packed 1-bit printer rows, returns (bytes per row, data)
     if im.width > printerWidth:
         # Image is wider than printer resolution; scale it down proportionately
         height = int(im.height * (printerWidth / im.width))
@@ -526,22 +724,53 @@ def printImage(serial_conn, im):
     # ... and now convert back to single bit
     im = im.convert('1')
 
-    buf = b''.join((bytearray(b'\x1d\x76\x30\x00'),
-                    struct.pack('2B', int(im.size[0] / 8 % 256),
-                                int(im.size[0] / 8 / 256)),
-                    struct.pack('2B', int(im.size[1] % 256),
-                                int(im.size[1] / 256)),
-                    im.tobytes()))
+    return im.size[0] // 8, im.tobytes()
 
-    serial_conn.write(buf)
+def rasterCommand(width_bytes, data): #Wrapping packed rows into a GS v 0 raster bit image command
+    rows = len(data) // width_bytes
+    return b''.join((bytearray(b'\x1d\x76\x30\x00'),
+                     struct.pack('2B', int(width_bytes % 256),
+                                 int(width_bytes / 256)),
+                     struct.pack('2B', int(rows % 256),
+                                 int(rows / 256)),
+                     data))
 
-def trimImage(im):
+def sendRaster(serial_conn, width_bytes, data):
+    if getattr(serial_conn, 'offline', False): #No print head to cool, captures stay the same from one run to the next
+        serial_conn.write(rasterCommand(width_bytes, data))
+        return
+
+    #Only splitting the raster where the thermal scheduler wants a cool-down pause, light jobs still go out as one command
+    for first, last, pause in thermal.plan(data, width_bytes):
+        if pause:
+            serial_conn.flush() #Waiting for the earlier bands to leave, so the pause really lands in front of the hot band
+            print(f'Cooling print head for {pause:.1f}s')
+            pace(serial_conn, pause)
+        serial_conn.write(rasterCommand(width_bytes, data[first * width_bytes:last * width_bytes]))
+
+replay_pauses = {'init': 0.5, 'start': 0.5, 'end': 0.5, 'bytes': 0.2} #Same breathing room the live print paths give the printer
+
+def replayCapture(serial_conn, path): #Sending a captured .bin file straight to the printer, no PIL work involved
+    if not os.path.getsize(path): #mmap can't map an empty file
+        print("Nothing to replay")
+        return
+    with open(path, 'rb') as captureFile, mmap.mmap(captureFile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for kind, payload in iter_commands(data):
+            if kind == 'raster':
+                sendRaster(serial_conn, *payload) #Rasters still go through the thermal scheduler
+            else:
+                serial_conn.write(payload)
+            pace(serial_conn, replay_pauses.get(kind, 0))
+
+def trimImage(im, top=None, bottom=None): #top and bottom override the trim so a symbol's quiet zone stays in
     bg = PIL.Image.new(im.mode, im.size, (255, 255, 255))
     diff = PIL.ImageChops.difference(im, bg)
     diff = PIL.ImageChops.add(diff, diff, 2.0)
     bbox = diff.getbbox()
     if bbox:
-        return im.crop((bbox[0], bbox[1], bbox[2], bbox[3] + 10))  # Don't cut off the end of the image
+        top = bbox[1] if top is None else top
+        bottom = bbox[3] + 10 if bottom is None else max(bottom, bbox[3] + 10)
+        return im.crop((0, top, bbox[2], bottom))  # Don't cut off the end of the image, or the quiet zone left of a barcode
 
 def initializePrinter(soc):
     soc.write(b"\x1b\x40")
@@ -556,6 +785,400 @@ def sendEndPrintSequence(soc):
 
 #TEXT AND IMAGE INPUT RENDERING AND PRINTING ENDS HERE
 
+#VECTOR AND PDF INPUT STARTS HERE
+documentTypes = ('.svg', '.pdf') #Files rasterized through PyMuPDF instead of opened with PIL
+documentBandHeight = 256 #Rows rendered at a time, so a page never sits in memory as one big bitmap
+
+def is_document(path):
+    return path.lower().endswith(documentTypes)
+
+def open_document(path):
+    if pymupdf is None:
+        raise Exception("Printing SVG and PDF files needs PyMuPDF (pip install pymupdf)")
+    return pymupdf.open(path)
+
+def iter_page_bands(page): #Rasterizing a page straight to grayscale at printer width, one band of rows at a time
+    scale = printerWidth / page.rect.width
+    height = int(page.rect.height * scale)
+    matrix = pymupdf.Matrix(scale, scale)
+    for top in range(0, height, documentBandHeight):
+        bottom = min(top + documentBandHeight, height)
+        clip = pymupdf.Rect(page.rect.x0, page.rect.y0 + top / scale, page.rect.x1, page.rect.y0 + bottom / scale)
+        pixmap = page.get_pixmap(matrix=matrix, clip=clip, colorspace=pymupdf.csGRAY, alpha=False)
+        band = PIL.Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+        if band.size != (printerWidth, bottom - top): #Pixmap rounding can be a row or column off, keep the bands seamless
+            exact_band = PIL.Image.new('L', (printerWidth, bottom - top), 255)
+            exact_band.paste(band)
+            band = exact_band
+        yield band
+
+def document_preview(path): #Rendering the first page of an SVG or PDF file at thumbnail size
+    with open_document(path) as document:
+        page = document[0]
+        scale = 300 / page.rect.width
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(scale, scale), colorspace=pymupdf.csGRAY, alpha=False)
+        return PIL.Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+
+def printDocument(serial_conn, path): #Printing every page of an SVG or PDF file as its own job, streamed band by band
+    with open_document(path) as document:
+        initializePrinter(serial_conn)
+        pace(serial_conn, 0.5)
+        for page_number, page in enumerate(document, 1):
+            print(f'Printing page {page_number} of {document.page_count}')
+            sendStartPrintSequence(serial_conn)
+            pace(serial_conn, 0.5)
+            for band in iter_page_bands(page):
+                if image_brightness != 1.0:
+                    band = PIL.ImageEnhance.Brightness(band).enhance(image_brightness)
+                sendRaster(serial_conn, *packImage(band))
+            pace(serial_conn, 0.5)
+            # Add two blank lines before end sequence
+            serial_conn.write(b"\r\n\r\n")
+            pace(serial_conn, 0.2)
+            sendEndPrintSequence(serial_conn)
+            pace(serial_conn, 0.5)
+#VECTOR AND PDF INPUT ENDS HERE
+
+#BARCODES AND QR CODES STARTS HERE
+symbolPattern = re.compile(r'^\s*\[\[(code128|ean13|qr):(.+?)\]\]\s*$', re.IGNORECASE) #A text line like [[qr:https://example.com]] becomes a symbol
+barcodeHeight = 80 #Bar height in dots for Code 128 and EAN-13, 10mm at 8 dots/mm
+symbolMinDots = 2 #Smallest module in dots, single-dot bars don't burn reliably enough to scan
+
+#Bar and space widths of Code 128 values 0 to 106, 103-105 being the start codes and 106 the stop pattern
+code128Patterns = """212222 222122 222221 121223 121322 131222 122213 122312 132212 221213 221312 231212 112232 122132 122231 113222
+    123122 123221 223211 221132 221231 213212 223112 312131 311222 321122 321221 312212 322112 322211 212123 212321 232121 111323
+    131123 131321 112313 132113 132311 211313 231113 231311 112133 112331 132131 113123 113321 133121 313121 211331 231131 213113
+    213311 213131 311123 311321 331121 312113 312311 332111 314111 221411 431111 111224 111422 121124 121421 141122 141221 112214
+    112412 122114 122411 142112 142211 241211 221114 413111 241112 134111 111242 121142 121241 114212 124112 124211 411212 421112
+    421211 212141 214121 412121 111143 111341 131141 114113 114311 411113 411311 113141 114131 311141 411131 211412 211214 211232
+    2331112""".split()
+
+eanLeftCodes = ['0001101', '0011001', '0010011', '0111101', '0100011', '0110001', '0101111', '0111011', '0110111', '0001011'] #L codes, R codes are their complement and G codes the mirrored R codes
+eanParity = ['LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG', 'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL'] #Left half code sets picked by the first digit
+
+def code128_modules(data): #Encoding text as Code 128 modules ('1' = bar), code set C for digit runs and B for everything else
+    values = []
+    code_set = None
+    position = 0
+    while position < len(data):
+        digits = len(data[position:]) - len(data[position:].lstrip('0123456789'))
+        if digits >= 4 or (digits >= 2 and digits == len(data) - position and digits % 2 == 0):
+            if code_set != 'C':
+                values.append(105 if code_set is None else 99) #Start C, or switch to C
+                code_set = 'C'
+            for pair in range(position, position + digits - digits % 2, 2):
+                values.append(int(data[pair:pair + 2]))
+            position += digits - digits % 2
+        else:
+            character = data[position]
+            if not ' ' <= character <= '\x7f':
+                raise Exception(f"Code 128 can't encode {character!r}")
+            if code_set != 'B':
+                values.append(104 if code_set is None else 100) #Start B, or switch to B
+                code_set = 'B'
+            values.append(ord(character) - 32)
+            position += 1
+
+    if not values:
+        raise Exception("Nothing to encode in Code 128")
+    values.append((values[0] + sum(weight * value for weight, value in enumerate(values[1:], 1))) % 103) #Checksum
+    values.append(106) #Stop
+    return ''.join(('1' if index % 2 == 0 else '0') * int(width)
+                   for value in values for index, width in enumerate(code128Patterns[value]))
+
+def ean13_modules(data): #Encoding 12 or 13 digits as EAN-13, returns (all modules, guard bar modules only)
+    if not data.isdigit() or len(data) not in (12, 13):
+        raise Exception("EAN-13 needs 12 digits, or 13 with the check digit")
+    digits = [int(digit) for digit in data]
+    check = (10 - sum(digit * (3 if index % 2 else 1) for index, digit in enumerate(digits[:12])) % 10) % 10
+    if len(digits) == 13 and digits[12] != check:
+        raise Exception(f"EAN-13 check digit should be {check}")
+    digits = digits[:12] + [check]
+
+    left = ''
+    for digit, code_set in zip(digits[1:7], eanParity[digits[0]]):
+        code = eanLeftCodes[digit]
+        left += code if code_set == 'L' else code.translate(str.maketrans('01', '10'))[::-1]
+    right = ''.join(eanLeftCodes[digit].translate(str.maketrans('01', '10')) for digit in digits[7:])
+    modules = '101' + left + '01010' + right + '101'
+    guards = '101' + '0' * 42 + '01010' + '0' * 42 + '101'
+    return modules, guards
+
+def qr_matrix(data): #Encoding text as QR code module rows ('1' = dark), quiet zone included
+    if qrcode is None:
+        raise Exception("QR codes need the qrcode package (pip install qrcode)")
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=4)
+    code.add_data(data)
+    code.make(fit=True)
+    return [''.join('1' if module else '0' for module in row) for row in code.get_matrix()]
+
+def fit_modules(modules, most_dots): #Biggest whole number of dots per module that fits the symbol on the paper
+    module_dots = min(most_dots, printerWidth // modules)
+    if module_dots < symbolMinDots:
+        raise Exception(f"Symbol is {modules} modules wide, too wide for {symbolMinDots} dots per module on the {printerWidth} dots the printer has")
+    return module_dots
+
+def symbol_image(rows, module_dots): #Packing (modules, height in dots) rows straight into a 1-bit image, no resizing or dithering
+    width = max(len(modules) for modules, height in rows) * module_dots
+    width += -width % 8
+    widen = {ord('1'): '0' * module_dots, ord('0'): '1' * module_dots} #PIL's 1-bit images have set bits for white
+    data = []
+    for modules, height in rows:
+        bits = modules.translate(widen).ljust(width, '1')
+        data.append(int(bits, 2).to_bytes(width // 8, 'big') * height)
+    return PIL.Image.frombytes('1', (width, sum(height for modules, height in rows)), b''.join(data))
+
+def render_symbol(kind, data): #Drawing a Code 128, EAN-13 or QR symbol with every module a whole number of printer dots
+    if kind == 'code128':
+        modules = '0' * 10 + code128_modules(data) + '0' * 10
+        return symbol_image([(modules, barcodeHeight)], fit_modules(len(modules), 4))
+    if kind == 'ean13':
+        modules, guards = ean13_modules(data)
+        modules, guards = '0' * 11 + modules + '0' * 7, '0' * 11 + guards + '0' * 7
+        module_dots = fit_modules(len(modules), 4)
+        return symbol_image([(modules, barcodeHeight), (guards, 5 * module_dots)], module_dots) #Guard bars run a little longer
+    if kind == 'qr':
+        matrix = qr_matrix(data)
+        module_dots = fit_modules(len(matrix), 8)
+        return symbol_image([(row, module_dots) for row in matrix], module_dots)
+    raise Exception(f"Unknown symbology: {kind}")
+#BARCODES AND QR CODES ENDS HERE
+
+#BULK LABEL MERGE STARTS HERE
+def iter_merge_rows(data_path, progress): #Generator yielding (line number, row dict) one CSV or JSONL row at a time, so huge files never sit in memory
+    with open(data_path, 'rb') as dataFile:
+        progress['total_bytes'] = os.fstat(dataFile.fileno()).st_size
+
+        def lines(): #Decoding line by line while keeping track of how far into the file we are
+            for raw_line in dataFile:
+                progress['bytes'] += len(raw_line)
+                yield raw_line.decode('utf-8-sig', errors='replace')
+
+        if data_path.lower().endswith(('.jsonl', '.ndjson')):
+            for line_number, line in enumerate(lines(), 1):
+                if not line.strip():
+                    continue
+                try: #One bad line shouldn't stop a million-row run
+                    row = json.loads(line)
+                except ValueError as e:
+                    print(f"Line {line_number} skipped: {e}")
+                    progress['skipped'] += 1
+                    continue
+                if not isinstance(row, dict):
+                    print(f"Line {line_number} skipped: not a JSON object")
+                    progress['skipped'] += 1
+                    continue
+                yield line_number, row
+        else:
+            reader = csv.DictReader(lines())
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    print(f"Line {reader.line_num} skipped: {e}")
+                    progress['skipped'] += 1
+                    continue
+                if None in row or None in row.values(): #DictReader fills short rows with None and files extra fields under None
+                    print(f"Line {reader.line_num} skipped: expected {len(reader.fieldnames)} fields")
+                    progress['skipped'] += 1
+                    continue
+                yield reader.line_num, row
+
+def merge_progress(printed, progress, elapsed): #Building a throughput and ETA line for bulk runs
+    rate = printed / elapsed if elapsed else 0.0
+    if progress['total_bytes'] and progress['bytes']:
+        done = progress['bytes'] / progress['total_bytes']
+        eta = elapsed * (1 - done) / done
+        return f"{printed} labels printed, {rate:.2f} labels/s, {done:.0%} of file, ETA {eta:.0f}s"
+    return f"{printed} labels printed, {rate:.2f} labels/s"
+#BULK LABEL MERGE ENDS HERE
+
+#HEADLESS MODES STARTS HERE
+# Check if running in web mode
+if args.web_data:
+    try:
+        # Load web data
+        with open(args.web_data, 'r') as f:
+            web_data = json.load(f)
+
+        action = web_data.get('action')
+        com_port = web_data.get('com_port', 'COM3')
+
+        # Connect to printer
+        if not connect_printer(com_port):
+            print("Failed to connect to printer")
+            sys.exit(1)
+
+        if action == 'print_text':
+            # Process text printing
+            text_content = web_data.get('text_content', '')
+            font = web_data.get('font', 'arial.ttf')
+            font_size = int(web_data.get('font_size', 28))
+            bold = web_data.get('bold', 'false').lower() == 'true'
+            italic = web_data.get('italic', 'false').lower() == 'true'
+            strikethrough = web_data.get('strikethrough', 'false').lower() == 'true'
+
+            # Update global text formatting options
+            text_font = font
+            text_size = font_size
+            text_bold = bold
+            text_italic = italic
+            text_strikethrough = strikethrough
+
+            img = create_text(text_content)
+
+            # Print the text
+            initializePrinter(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+            sendStartPrintSequence(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+            printImage(printer.serial_conn, img)
+            pace(printer.serial_conn, 0.5)
+            # Add two blank lines before end sequence
+            printer.serial_conn.write(b"\r\n\r\n")
+            pace(printer.serial_conn, 0.2)
+            sendEndPrintSequence(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+
+            print("Text printed successfully")
+
+        elif action == 'print_image' and is_document(web_data.get('image_path', '')):
+            # SVG and PDF files are rasterized at printer width and printed page by page
+            image_brightness = float(web_data.get('brightness', 1.0))
+            printDocument(printer.serial_conn, web_data['image_path'])
+
+            print("Document printed successfully")
+
+        elif action == 'print_image':
+            # Process image printing
+            image_path = web_data.get('image_path', '')
+            brightness = float(web_data.get('brightness', 1.0))
+
+            # Load and process image
+            image_brightness = brightness
+            original_image = PIL.Image.open(image_path)
+            apply_image_brightness()  # Apply brightness adjustment
+
+            # Print the image
+            initializePrinter(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+            sendStartPrintSequence(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+            printImage(printer.serial_conn, current_image)
+            pace(printer.serial_conn, 0.5)
+            # Add two blank lines before end sequence
+            printer.serial_conn.write(b"\r\n\r\n")
+            pace(printer.serial_conn, 0.2)
+            sendEndPrintSequence(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+
+            print("Image printed successfully")
+
+        # Disconnect
+        printer.disconnect()
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"Web mode error: {e}")
+        sys.exit(1)
+
+# Check if running in bulk mode
+if args.bulk_data:
+    try:
+        if args.template_file:
+            with open(args.template_file, 'r', encoding='utf-8') as templateFile:
+                template = templateFile.read()
+        elif args.template:
+            template = args.template
+        else:
+            print("Bulk mode needs --template or --template-file")
+            sys.exit(1)
+
+        if args.font:
+            text_font = args.font
+        if args.font_size:
+            text_size = args.font_size
+
+        # Connect to printer once for the whole run
+        if not connect_printer(args.com_port):
+            print("Failed to connect to printer")
+            sys.exit(1)
+
+        progress = {'bytes': 0, 'total_bytes': 0, 'skipped': 0}
+        printed = 0
+        started = monotonic()
+        last_report = started
+
+        initializePrinter(printer.serial_conn)
+        pace(printer.serial_conn, 0.5)
+        for line_number, row in iter_merge_rows(args.bulk_data, progress):
+            try:
+                label_text = template.format_map(row)
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                print(f"Line {line_number} skipped: {e!r}")
+                progress['skipped'] += 1
+                continue
+
+            try:
+                img = create_text(label_text)
+            except Exception as e: # A bad barcode or QR value only costs its own label
+                print(f"Line {line_number} skipped: {e}")
+                progress['skipped'] += 1
+                continue
+            if img is None: # Blank label, nothing to print
+                progress['skipped'] += 1
+                continue
+
+            sendStartPrintSequence(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+            printImage(printer.serial_conn, img)
+            pace(printer.serial_conn, 0.5)
+            # Add two blank lines before end sequence
+            printer.serial_conn.write(b"\r\n\r\n")
+            pace(printer.serial_conn, 0.2)
+            sendEndPrintSequence(printer.serial_conn)
+            pace(printer.serial_conn, 0.5)
+            printed += 1
+
+            now = monotonic()
+            if now - last_report >= 5: # Reporting throughput and ETA every few seconds
+                last_report = now
+                print(merge_progress(printed, progress, now - started))
+
+        print(merge_progress(printed, progress, monotonic() - started))
+        print(f"Bulk print done: {printed} labels printed, {progress['skipped']} rows skipped")
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"Bulk mode error: {e}")
+        sys.exit(1)
+
+    finally:
+        # Disconnect, even after an error, so a partial session still gets closed and its output kept
+        if printer.connected:
+            printer.disconnect()
+
+# Check if replaying a captured print file
+if args.replay:
+    try:
+        if not connect_printer(args.com_port):
+            print("Failed to connect to printer")
+            sys.exit(1)
+
+        replayCapture(printer.serial_conn, args.replay)
+        print("Capture replayed successfully")
+
+        printer.disconnect()
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"Replay error: {e}")
+        sys.exit(1)
+
+#HEADLESS MODES ENDS HERE
+
 #GUI SETUP STARTS HERE
 
 root = tk.Tk()
@@ -595,7 +1218,7 @@ comPortCombo.pack(side="left", padx=(0, 10))
 connectButton = tk.Button(
     connectionFrame,
     text = "Connect",
-    command=lambda: printer.connect(comPortVar.get()),
+    command=lambda: connect_printer(comPortVar.get()),
     padx = 15,
     pady = 15
 ).pack(